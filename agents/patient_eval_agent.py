@@ -1,18 +1,32 @@
 # agents/patient_evaluation_agent.py
 
-from typing import Dict
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain_community.chat_models import ChatOpenAI
+import asyncio
+import hashlib
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, List
+import orjson
+from openai import AsyncOpenAI
+
+
+def _json_default(obj):
+    """Serialize values orjson doesn't handle natively, e.g. DECIMAL columns"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
 
 
 class PatientEvaluationAgent:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4-turbo", temperature=0.1)
+        self.model = "gpt-4-turbo"
+        self.temperature = 0.1
+        self._aclient = AsyncOpenAI()
+
+        # LRU of summaries keyed by a hash of the serialized patient payload
+        self._summary_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._summary_cache_size = 1024
 
-        self.prompt = PromptTemplate(
-            input_variables=["patient_data"],
-            template="""
+        self.prompt = """
             You are a clinical assistant summarizing a diabetic patient's condition for a physician.
 
             Below is structured patient data in JSON format:
@@ -29,24 +43,71 @@ class PatientEvaluationAgent:
 
             Be concise, structured, and use medical terminology. Use bullet points or paragraphs as needed.
             """
-        )
-
-        self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
 
-    async def run(self, patient_json: Dict) -> Dict:
+    async def run(self, patient_json: Dict, use_cache: bool = True) -> Dict:
         """
         Main entry for the Patient Evaluation Agent.
 
         Args:
             patient_json (Dict): Combined patient data object
+            use_cache (bool): Reuse a previous summary of an identical payload;
+                pass False to force regeneration
 
         Returns:
             Dict: {"summary": "..."}
         """
-        from json import dumps
+        # Compact output keeps the prompt (and token count) small; sorted
+        # keys make the bytes stable so they can double as the cache key
+        payload = orjson.dumps(
+            patient_json,
+            default=_json_default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+        cache_key = hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+        if use_cache and cache_key in self._summary_cache:
+            self._summary_cache.move_to_end(cache_key)
+            return {"summary": self._summary_cache[cache_key]}
+
+        input_text = payload.decode()
+        messages = [
+            {"role": "system", "content": self.prompt.replace("{patient_data}", input_text)}
+        ]
+        response = await self._aclient.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+        )
+        summary = (response.choices[0].message.content or "").strip()
+
+        # An empty summary (e.g. a refusal) is a failed generation; leave it
+        # uncached so the next call asks the model again
+        if summary:
+            self._summary_cache[cache_key] = summary
+            self._summary_cache.move_to_end(cache_key)
+            if len(self._summary_cache) > self._summary_cache_size:
+                self._summary_cache.popitem(last=False)
+
+        return {"summary": summary}
+
+    async def run_many(
+        self, patients: List[Dict], concurrency: int = 8, use_cache: bool = True
+    ) -> List[Dict]:
+        """
+        Evaluate several patients concurrently.
+
+        Args:
+            patients (List[Dict]): Patient data objects, as accepted by run()
+            concurrency (int): Maximum number of in-flight model calls
+            use_cache (bool): Passed through to run()
+
+        Returns:
+            List[Dict]: One {"summary": "..."} per patient, in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
 
-        input_text = dumps(patient_json, indent=2)
-        result = await self.chain.arun(patient_data=input_text)
-        return {"summary": result.strip()}
+        async def run_one(patient_json: Dict) -> Dict:
+            async with semaphore:
+                return await self.run(patient_json, use_cache=use_cache)
 
-print("Hello")
\ No newline at end of file
+        return await asyncio.gather(*(run_one(p) for p in patients))
\ No newline at end of file
@@ -18,7 +18,12 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'diabetes_db'),
     'user': os.getenv('DB_USER', 'postgres'),
     'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': int(os.getenv('DB_PORT', 5431))
+    'port': int(os.getenv('DB_PORT', 5431)),
+    'connect_timeout': 5,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
 }
 
 def clean_database():
@@ -26,44 +31,18 @@ def clean_database():
     try:
         # Connect to the diabetes database
         conn = psycopg2.connect(**DB_CONFIG)
-        conn.autocommit = True
         cursor = conn.cursor()
         
-        # Drop all tables in the correct order (respecting foreign keys)
-        tables_to_drop = [
-            'appointments',
-            'vital_signs', 
-            'patient_medications',
-            'medications',
-            'glucose_readings',
-            'lab_results',
-            'medical_history',
-            'patient_phenotypes',
-            'phenotypes',
-            'patients'
-        ]
-        
+        # Recreate the public schema rather than enumerating its contents, so
+        # tables, views and functions added to schema.sql are covered too
         print("Cleaning up existing tables...")
-        for table in tables_to_drop:
-            try:
-                cursor.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
-                print(f"Dropped table: {table}")
-            except Exception as e:
-                print(f"Error dropping {table}: {e}")
-        
-        # Drop views
-        try:
-            cursor.execute("DROP VIEW IF EXISTS patient_summary CASCADE")
-            print("Dropped view: patient_summary")
-        except Exception as e:
-            print(f"Error dropping view: {e}")
-        
-        # Drop functions
-        try:
-            cursor.execute("DROP FUNCTION IF EXISTS update_updated_at_column() CASCADE")
-            print("Dropped function: update_updated_at_column")
-        except Exception as e:
-            print(f"Error dropping function: {e}")
+        cursor.execute("DROP SCHEMA public CASCADE")
+        cursor.execute("CREATE SCHEMA public")
+        # The new schema is owned by the connecting role; restore the stock
+        # PostgreSQL 14 grant so other roles can still use it
+        cursor.execute("GRANT ALL ON SCHEMA public TO PUBLIC")
+        conn.commit()
+        print("Dropped and recreated schema: public")
         
         cursor.close()
         conn.close()
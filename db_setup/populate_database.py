@@ -10,10 +10,16 @@ Populates PostgreSQL database with synthetic patient data covering 5 key phenoty
 """
 
 import psycopg2
+import psycopg2.extras
+import io
+import multiprocessing
 import random
+import string
+import numpy as np
 from datetime import datetime, date, timedelta
 import uuid
 from faker import Faker
+from faker.providers.person.en_US import Provider as PersonProvider
 import sys
 from dotenv import load_dotenv
 import os
@@ -23,15 +29,120 @@ load_dotenv()
 # Initialize Faker for generating realistic data
 fake = Faker()
 
+# Faker's name providers make a weighted pick from an OrderedDict on every
+# call; a plain random.choice over the same names is far cheaper
+FIRST_NAMES = tuple(PersonProvider.first_names)
+LAST_NAMES = tuple(PersonProvider.last_names)
+EMAIL_DOMAINS = ('gmail.com', 'yahoo.com', 'hotmail.com')
+ASCII_ALPHANUM = string.ascii_uppercase + string.digits
+
 # Database connection parameters
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
     'database': os.getenv('DB_NAME', 'diabetes_db'),
     'user': os.getenv('DB_USER', 'postgres'),
     'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': int(os.getenv('DB_PORT', 5432))
+    'port': int(os.getenv('DB_PORT', 5432)),
+    'connect_timeout': 5,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
 }
 
+# Date windows are (earliest, latest) offsets in days from today
+DAYS_PER_YEAR = 365
+DIAGNOSIS_DAYS = (-5 * DAYS_PER_YEAR, -1 * DAYS_PER_YEAR)
+LAB_TEST_DAYS = (-30, 0)
+PRESCRIPTION_DAYS = (-6 * 30, -1 * 30)
+
+# Everything that varies by phenotype: date-of-birth window, body
+# measurement ranges, history, lab and glucose value ranges, medications
+PHENOTYPE_PARAMS = {
+    'Type 1 Diabetes - Autoimmune': {
+        'dob_days': (-40 * DAYS_PER_YEAR, -15 * DAYS_PER_YEAR),
+        'height_cm': (150, 190),
+        'weight_kg': (50, 80),  # Typically lean
+        'conditions': ['Type 1 Diabetes', 'Autoimmune Disease'],
+        'hba1c': (7.0, 12.0),
+        'fasting_glucose': (120, 300),
+        'glucose': (80, 350),
+        'medications': ['Insulin Glargine', 'Insulin Lispro']
+    },
+    'Type 2 Diabetes - Insulin Resistant': {
+        'dob_days': (-70 * DAYS_PER_YEAR, -40 * DAYS_PER_YEAR),
+        'height_cm': (150, 190),
+        'weight_kg': (70, 120),  # Often overweight
+        'conditions': ['Type 2 Diabetes', 'Hypertension', 'Dyslipidemia'],
+        'hba1c': (7.0, 12.0),
+        'fasting_glucose': (120, 300),
+        'glucose': (80, 350),
+        'medications': ['Metformin', 'Glipizide', 'Insulin Glargine']
+    },
+    'Gestational Diabetes': {
+        'gender': 'Female',  # Only females can have gestational diabetes
+        'dob_days': (-45 * DAYS_PER_YEAR, -25 * DAYS_PER_YEAR),
+        'height_cm': (150, 175),
+        'weight_kg': (60, 100),
+        'conditions': ['Gestational Diabetes', 'Pregnancy'],
+        'hba1c': (5.7, 8.0),
+        'fasting_glucose': (95, 140),
+        'glucose': (70, 200),
+        'medications': ['Insulin Lispro', 'Metformin']
+    },
+    'MODY (Maturity Onset Diabetes of the Young)': {
+        'dob_days': (-50 * DAYS_PER_YEAR, -25 * DAYS_PER_YEAR),
+        'height_cm': (150, 190),
+        'weight_kg': (50, 85),  # Typically normal weight
+        'conditions': ['MODY', 'Family History of Diabetes'],
+        'hba1c': (6.5, 9.0),
+        'fasting_glucose': (100, 200),
+        'glucose': (90, 250),
+        'medications': ['Sulfonylurea', 'Metformin']
+    },
+    'LADA (Latent Autoimmune Diabetes in Adults)': {
+        'dob_days': (-60 * DAYS_PER_YEAR, -30 * DAYS_PER_YEAR),
+        'height_cm': (150, 190),
+        'weight_kg': (55, 90),  # Often normal weight
+        'conditions': ['LADA', 'Autoimmune Disease'],
+        'hba1c': (6.5, 9.0),
+        'fasting_glucose': (100, 200),
+        'glucose': (90, 250),
+        'medications': ['Metformin', 'Insulin Glargine']
+    }
+}
+
+READING_TYPES = ['Fasting', 'Postprandial', 'Random', 'Bedtime']
+MEAL_CONTEXTS = ['Breakfast', 'Lunch', 'Dinner', 'Snack', None]
+
+PATIENT_COLUMNS = (
+    'mrn', 'first_name', 'last_name', 'date_of_birth', 'gender', 'ethnicity',
+    'height_cm', 'weight_kg', 'bmi', 'phone', 'email', 'address',
+    'emergency_contact_name', 'emergency_contact_phone',
+    'insurance_provider', 'insurance_id'
+)
+PATIENT_PHENOTYPE_COLUMNS = (
+    'patient_id', 'phenotype_id', 'assigned_date', 'confidence_score', 'notes'
+)
+GLUCOSE_READING_COLUMNS = (
+    'patient_id', 'reading_date', 'glucose_value', 'reading_type', 'meal_context', 'notes'
+)
+VITAL_SIGN_COLUMNS = (
+    'patient_id', 'measurement_date', 'systolic_bp', 'diastolic_bp',
+    'heart_rate', 'temperature', 'respiratory_rate', 'oxygen_saturation', 'notes'
+)
+MEDICAL_HISTORY_COLUMNS = (
+    'patient_id', 'condition_name', 'diagnosis_date', 'status', 'severity', 'notes'
+)
+LAB_RESULT_COLUMNS = (
+    'patient_id', 'test_date', 'test_name', 'test_value', 'unit',
+    'reference_range_low', 'reference_range_high', 'is_abnormal', 'notes'
+)
+PATIENT_MEDICATION_COLUMNS = (
+    'patient_id', 'medication_id', 'prescribed_date', 'start_date', 'dosage',
+    'frequency', 'route', 'status', 'prescribed_by', 'notes'
+)
+
 def connect_to_db():
     """Establish database connection"""
     try:
@@ -41,6 +152,28 @@ def connect_to_db():
         print(f"Error connecting to database: {e}")
         sys.exit(1)
 
+def copy_value(value):
+    """Render a single value in PostgreSQL COPY text format"""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def bulk_copy(cursor, table, columns, rows):
+    """Load rows into a table with a single COPY ... FROM STDIN"""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write('\t'.join(copy_value(value) for value in row))
+        buf.write('\n')
+    buf.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT text)", buf
+    )
+
+def random_date(today, days_range, rng):
+    """Pick a uniformly random date within an (earliest, latest) day-offset window"""
+    return today + timedelta(days=rng.randint(*days_range))
+
 def insert_phenotypes(conn):
     """Insert the 5 key diabetes phenotypes"""
     phenotypes = [
@@ -77,314 +210,294 @@ def insert_phenotypes(conn):
     ]
     
     cursor = conn.cursor()
-    phenotype_ids = {}
+    created_at = datetime.now()
+    names = [phenotype['name'] for phenotype in phenotypes]
     
-    for phenotype in phenotypes:
-        cursor.execute("""
-            INSERT INTO phenotypes (phenotype_name, description, criteria, severity_level, created_at)
-            VALUES (%s, %s, %s, %s, %s)
-            ON CONFLICT (phenotype_name) DO NOTHING
-            RETURNING phenotype_id;
-        """, (
-            phenotype['name'],
-            phenotype['description'],
-            phenotype['criteria'],
-            phenotype['severity'],
-            datetime.now()
-        ))
-        result = cursor.fetchone()
-        if result:
-            phenotype_ids[phenotype['name']] = result[0]
-        else:
-            cursor.execute("SELECT phenotype_id FROM phenotypes WHERE phenotype_name = %s", (phenotype['name'],))
-            phenotype_ids[phenotype['name']] = cursor.fetchone()[0]
+    # Insert all phenotypes in one statement, then read back every id (new or
+    # pre-existing) in a second one
+    psycopg2.extras.execute_values(cursor, """
+        INSERT INTO phenotypes (phenotype_name, description, criteria, severity_level, created_at)
+        VALUES %s
+        ON CONFLICT (phenotype_name) DO NOTHING
+    """, [
+        (phenotype['name'], phenotype['description'], phenotype['criteria'],
+         phenotype['severity'], created_at)
+        for phenotype in phenotypes
+    ])
+    cursor.execute(
+        "SELECT phenotype_name, phenotype_id FROM phenotypes WHERE phenotype_name = ANY(%s)", (names,)
+    )
+    ids_by_name = dict(cursor.fetchall())
+    phenotype_ids = {name: ids_by_name[name] for name in names}
     
-    conn.commit()
     cursor.close()
     return phenotype_ids
 
-def generate_patient_data(phenotype_name):
+def generate_patient_data(phenotype_name, today, rng):
     """Generate patient data based on phenotype characteristics"""
+    params = PHENOTYPE_PARAMS[phenotype_name]
     patient = {}
     
     # Base demographics
-    patient['first_name'] = fake.first_name()
-    patient['last_name'] = fake.last_name()
-    patient['gender'] = random.choice(['Male', 'Female'])
-    patient['ethnicity'] = random.choice(['Caucasian', 'African American', 'Hispanic', 'Asian', 'Other'])
-    # Format phone numbers: digits only, max 20 chars
-    patient['phone'] = ''.join(filter(str.isdigit, fake.phone_number()))[:20]
-    patient['email'] = fake.email()
+    patient['first_name'] = rng.choice(FIRST_NAMES)
+    patient['last_name'] = rng.choice(LAST_NAMES)
+    patient['gender'] = params.get('gender') or rng.choice(['Male', 'Female'])
+    patient['ethnicity'] = rng.choice(['Caucasian', 'African American', 'Hispanic', 'Asian', 'Other'])
+    # Phone numbers: 10 digits, within the 20-char column
+    patient['phone'] = str(rng.randint(1000000000, 9999999999))
+    patient['email'] = (
+        f"{patient['first_name']}.{patient['last_name']}{rng.randint(1, 99)}"
+        f"@{rng.choice(EMAIL_DOMAINS)}"
+    ).lower()
     patient['address'] = fake.address()
-    patient['emergency_contact_name'] = fake.name()
-    patient['emergency_contact_phone'] = ''.join(filter(str.isdigit, fake.phone_number()))[:20]
-    patient['insurance_provider'] = random.choice(['Blue Cross', 'Aetna', 'Cigna', 'UnitedHealth', 'Kaiser'])
-    # Format insurance_id: alphanumeric, max 20 chars
-    patient['insurance_id'] = ''.join(filter(str.isalnum, fake.uuid4()))[:20].upper()
+    patient['emergency_contact_name'] = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    patient['emergency_contact_phone'] = str(rng.randint(1000000000, 9999999999))
+    patient['insurance_provider'] = rng.choice(['Blue Cross', 'Aetna', 'Cigna', 'UnitedHealth', 'Kaiser'])
+    # insurance_id: 20 uppercase alphanumeric chars
+    patient['insurance_id'] = ''.join(rng.choices(ASCII_ALPHANUM, k=20))
     
     # Phenotype-specific characteristics
-    if phenotype_name == 'Type 1 Diabetes - Autoimmune':
-        patient['date_of_birth'] = fake.date_between(start_date='-40y', end_date='-15y')
-        patient['height_cm'] = random.uniform(150, 190)
-        patient['weight_kg'] = random.uniform(50, 80)  # Typically lean
-        patient['bmi'] = round(patient['weight_kg'] / ((patient['height_cm']/100) ** 2), 2)
-        
-    elif phenotype_name == 'Type 2 Diabetes - Insulin Resistant':
-        patient['date_of_birth'] = fake.date_between(start_date='-70y', end_date='-40y')
-        patient['height_cm'] = random.uniform(150, 190)
-        patient['weight_kg'] = random.uniform(70, 120)  # Often overweight
-        patient['bmi'] = round(patient['weight_kg'] / ((patient['height_cm']/100) ** 2), 2)
-        
-    elif phenotype_name == 'Gestational Diabetes':
-        patient['gender'] = 'Female'  # Only females can have gestational diabetes
-        patient['date_of_birth'] = fake.date_between(start_date='-45y', end_date='-25y')
-        patient['height_cm'] = random.uniform(150, 175)
-        patient['weight_kg'] = random.uniform(60, 100)
-        patient['bmi'] = round(patient['weight_kg'] / ((patient['height_cm']/100) ** 2), 2)
-        
-    elif phenotype_name == 'MODY (Maturity Onset Diabetes of the Young)':
-        patient['date_of_birth'] = fake.date_between(start_date='-50y', end_date='-25y')
-        patient['height_cm'] = random.uniform(150, 190)
-        patient['weight_kg'] = random.uniform(50, 85)  # Typically normal weight
-        patient['bmi'] = round(patient['weight_kg'] / ((patient['height_cm']/100) ** 2), 2)
-        
-    elif phenotype_name == 'LADA (Latent Autoimmune Diabetes in Adults)':
-        patient['date_of_birth'] = fake.date_between(start_date='-60y', end_date='-30y')
-        patient['height_cm'] = random.uniform(150, 190)
-        patient['weight_kg'] = random.uniform(55, 90)  # Often normal weight
-        patient['bmi'] = round(patient['weight_kg'] / ((patient['height_cm']/100) ** 2), 2)
+    patient['date_of_birth'] = random_date(today, params['dob_days'], rng)
+    patient['height_cm'] = rng.uniform(*params['height_cm'])
+    patient['weight_kg'] = rng.uniform(*params['weight_kg'])
+    patient['bmi'] = round(patient['weight_kg'] / ((patient['height_cm']/100) ** 2), 2)
     
     return patient
 
+def build_patient_payload(phenotype_name, seed, now):
+    """Generate one patient and their clinical rows (without patient_id) from a seed"""
+    # Draw from generators local to this payload so it depends only on its
+    # arguments, whichever process builds it, and the caller's global
+    # random state is left alone. seed_instance gives this module's Faker
+    # its own Random rather than reseeding the one Faker instances share.
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    fake.seed_instance(seed)
+    today = now.date()
+    
+    return {
+        'phenotype_name': phenotype_name,
+        'patient': generate_patient_data(phenotype_name, today, rng),
+        'confidence_score': round(rng.uniform(0.7, 1.0), 2),
+        'history': add_medical_history(phenotype_name, today, rng),
+        'labs': add_lab_results(phenotype_name, today, rng),
+        'glucose': add_glucose_readings(phenotype_name, now, np_rng),
+        'vitals': add_vital_signs(now, np_rng),
+        'medications': add_medications(phenotype_name, today, rng)
+    }
+
+def generate_patient_payloads(phenotype_names, patients_per_phenotype=4):
+    """Build all patient payloads, across POPULATE_WORKERS processes if set"""
+    # One reference time for the whole run, so every patient's readings
+    # share the same dates
+    now = datetime.now()
+    jobs = [
+        (phenotype_name, random.randrange(2**32), now)
+        for phenotype_name in phenotype_names
+        for _ in range(patients_per_phenotype)
+    ]
+    workers = int(os.getenv('POPULATE_WORKERS', 1))
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            return pool.starmap(build_patient_payload, jobs)
+    return [build_patient_payload(*job) for job in jobs]
+
+def resolve_medication_ids(cursor, med_names):
+    """Map medication names to ids, inserting any that are missing"""
+    cursor.execute(
+        "SELECT medication_name, medication_id FROM medications WHERE medication_name = ANY(%s)",
+        (list(med_names),)
+    )
+    med_ids = dict(cursor.fetchall())
+    
+    # medication_name has no unique constraint, so insert only the names the
+    # lookup didn't find rather than relying on ON CONFLICT
+    missing = [name for name in med_names if name not in med_ids]
+    if missing:
+        med_ids.update(psycopg2.extras.execute_values(cursor, """
+            INSERT INTO medications (medication_name, generic_name, medication_class, dosage_form, strength)
+            VALUES %s RETURNING medication_name, medication_id
+        """, [(name, name, 'Antidiabetic', 'Tablet', '500mg') for name in missing], fetch=True))
+    return med_ids
+
 def insert_patients_and_phenotypes(conn, phenotype_ids):
     """Insert 20 patients with phenotype assignments (4 patients per phenotype)"""
     cursor = conn.cursor()
+    assignment_rows = []
+    history_rows = []
+    lab_rows = []
+    glucose_rows = []
+    vital_rows = []
+    medication_rows = []
+    
+    # Generate everything up front (4 patients per phenotype); only the
+    # database ids are filled in below
+    print(f"Generating {len(phenotype_ids) * 4} patients...")
+    payloads = generate_patient_payloads(phenotype_ids)
+    med_ids = resolve_medication_ids(cursor, sorted({
+        med_name for params in PHENOTYPE_PARAMS.values() for med_name in params['medications']
+    }))
+    
+    # Insert all patients in one statement. Multi-row RETURNING order isn't
+    # guaranteed, so match the generated ids back by MRN.
+    # Consecutive MRNs from a random base are unique by construction
+    mrn_base = random.randint(10000, 99999 - len(payloads))
+    mrns = [f"MRN{mrn_base + idx:05d}" for idx in range(len(payloads))]
+    patient_rows = [
+        (mrn, *(payload['patient'][column] for column in PATIENT_COLUMNS[1:]))
+        for mrn, payload in zip(mrns, payloads)
+    ]
+    patient_ids = dict(psycopg2.extras.execute_values(
+        cursor,
+        f"INSERT INTO patients ({', '.join(PATIENT_COLUMNS)}) VALUES %s RETURNING mrn, patient_id",
+        patient_rows, fetch=True
+    ))
     
-    for phenotype_name, phenotype_id in phenotype_ids.items():
-        print(f"Creating patients for phenotype: {phenotype_name}")
+    for mrn, payload in zip(mrns, payloads):
+        phenotype_name = payload['phenotype_name']
+        patient_id = patient_ids[mrn]
+        
+        # Assign phenotype
+        assignment_rows.append((
+            patient_id, phenotype_ids[phenotype_name], date.today(),
+            payload['confidence_score'],
+            f"Assigned based on clinical presentation and diagnostic criteria"
+        ))
         
-        for i in range(4):  # 4 patients per phenotype
-            # Generate patient data
-            patient_data = generate_patient_data(phenotype_name)
-            
-            # Insert patient
-            cursor.execute("""
-                INSERT INTO patients (
-                    mrn, first_name, last_name, date_of_birth, gender, ethnicity,
-                    height_cm, weight_kg, bmi, phone, email, address,
-                    emergency_contact_name, emergency_contact_phone,
-                    insurance_provider, insurance_id
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING patient_id
-            """, (
-                f"MRN{fake.unique.random_number(digits=5)}",
-                patient_data['first_name'], patient_data['last_name'],
-                patient_data['date_of_birth'], patient_data['gender'],
-                patient_data['ethnicity'], patient_data['height_cm'],
-                patient_data['weight_kg'], patient_data['bmi'],
-                patient_data['phone'], patient_data['email'],
-                patient_data['address'], patient_data['emergency_contact_name'],
-                patient_data['emergency_contact_phone'],
-                patient_data['insurance_provider'], patient_data['insurance_id']
-            ))
-            
-            patient_id = cursor.fetchone()[0]
-            
-            # Assign phenotype
-            confidence_score = random.uniform(0.7, 1.0)
-            cursor.execute("""
-                INSERT INTO patient_phenotypes (
-                    patient_id, phenotype_id, assigned_date, confidence_score, notes
-                ) VALUES (%s, %s, %s, %s, %s)
-            """, (
-                patient_id, phenotype_id, date.today(),
-                round(confidence_score, 2),
-                f"Assigned based on clinical presentation and diagnostic criteria"
-            ))
-            
-            # Add medical history
-            add_medical_history(cursor, patient_id, phenotype_name)
-            
-            # Add lab results
-            add_lab_results(cursor, patient_id, phenotype_name)
-            
-            # Add glucose readings
-            add_glucose_readings(cursor, patient_id, phenotype_name)
-            
-            # Add vital signs
-            add_vital_signs(cursor, patient_id)
-            
-            # Add medications
-            add_medications(cursor, patient_id, phenotype_name)
+        # Attach the generated child rows to this patient
+        history_rows.extend((patient_id, *row) for row in payload['history'])
+        lab_rows.extend((patient_id, *row) for row in payload['labs'])
+        glucose_rows.extend((patient_id, *row) for row in payload['glucose'])
+        vital_rows.extend((patient_id, *row) for row in payload['vitals'])
+        for med_name, *prescription in payload['medications']:
+            medication_rows.append((patient_id, med_ids[med_name], *prescription))
+    
+    # Stream every child table in one COPY each
+    bulk_copy(cursor, 'patient_phenotypes', PATIENT_PHENOTYPE_COLUMNS, assignment_rows)
+    bulk_copy(cursor, 'medical_history', MEDICAL_HISTORY_COLUMNS, history_rows)
+    bulk_copy(cursor, 'lab_results', LAB_RESULT_COLUMNS, lab_rows)
+    bulk_copy(cursor, 'patient_medications', PATIENT_MEDICATION_COLUMNS, medication_rows)
+    bulk_copy(cursor, 'glucose_readings', GLUCOSE_READING_COLUMNS, glucose_rows)
+    bulk_copy(cursor, 'vital_signs', VITAL_SIGN_COLUMNS, vital_rows)
     
-    conn.commit()
     cursor.close()
 
-def add_medical_history(cursor, patient_id, phenotype_name):
-    """Add relevant medical history based on phenotype"""
-    conditions = []
-    
-    if phenotype_name == 'Type 1 Diabetes - Autoimmune':
-        conditions = ['Type 1 Diabetes', 'Autoimmune Disease']
-    elif phenotype_name == 'Type 2 Diabetes - Insulin Resistant':
-        conditions = ['Type 2 Diabetes', 'Hypertension', 'Dyslipidemia']
-    elif phenotype_name == 'Gestational Diabetes':
-        conditions = ['Gestational Diabetes', 'Pregnancy']
-    elif phenotype_name == 'MODY (Maturity Onset Diabetes of the Young)':
-        conditions = ['MODY', 'Family History of Diabetes']
-    elif phenotype_name == 'LADA (Latent Autoimmune Diabetes in Adults)':
-        conditions = ['LADA', 'Autoimmune Disease']
-    
-    for condition in conditions:
-        diagnosis_date = fake.date_between(start_date='-5y', end_date='-1y')
-        cursor.execute("""
-            INSERT INTO medical_history (
-                patient_id, condition_name, diagnosis_date, status, severity, notes
-            ) VALUES (%s, %s, %s, %s, %s, %s)
-        """, (
-            patient_id, condition, diagnosis_date, 'Active',
-            random.choice(['Mild', 'Moderate', 'Severe']),
+def add_medical_history(phenotype_name, today, rng):
+    """Build relevant medical history rows based on phenotype"""
+    rows = []
+    for condition in PHENOTYPE_PARAMS[phenotype_name]['conditions']:
+        diagnosis_date = random_date(today, DIAGNOSIS_DAYS, rng)
+        rows.append((
+            condition, diagnosis_date, 'Active',
+            rng.choice(['Mild', 'Moderate', 'Severe']),
             f"Diagnosed based on {phenotype_name} criteria"
         ))
+    return rows
 
-def add_lab_results(cursor, patient_id, phenotype_name):
-    """Add relevant laboratory results based on phenotype"""
+def add_lab_results(phenotype_name, today, rng):
+    """Build relevant laboratory result rows based on phenotype"""
+    params = PHENOTYPE_PARAMS[phenotype_name]
+    rows = []
+    
     # HbA1c
-    if phenotype_name in ['Type 1 Diabetes - Autoimmune', 'Type 2 Diabetes - Insulin Resistant']:
-        hba1c_value = random.uniform(7.0, 12.0)
-    elif phenotype_name == 'Gestational Diabetes':
-        hba1c_value = random.uniform(5.7, 8.0)
-    else:
-        hba1c_value = random.uniform(6.5, 9.0)
+    hba1c_value = rng.uniform(*params['hba1c'])
     
-    cursor.execute("""
-        INSERT INTO lab_results (
-            patient_id, test_date, test_name, test_value, unit,
-            reference_range_low, reference_range_high, is_abnormal, notes
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """, (
-        patient_id, fake.date_between(start_date='-30d', end_date='today'),
+    rows.append((
+        random_date(today, LAB_TEST_DAYS, rng),
         'HbA1c', round(hba1c_value, 1), '%', 4.0, 5.6, True,
         f"Elevated HbA1c consistent with {phenotype_name}"
     ))
     
     # Fasting Glucose
-    if phenotype_name in ['Type 1 Diabetes - Autoimmune', 'Type 2 Diabetes - Insulin Resistant']:
-        fasting_glucose = random.uniform(120, 300)
-    elif phenotype_name == 'Gestational Diabetes':
-        fasting_glucose = random.uniform(95, 140)
-    else:
-        fasting_glucose = random.uniform(100, 200)
+    fasting_glucose = rng.uniform(*params['fasting_glucose'])
     
-    cursor.execute("""
-        INSERT INTO lab_results (
-            patient_id, test_date, test_name, test_value, unit,
-            reference_range_low, reference_range_high, is_abnormal, notes
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """, (
-        patient_id, fake.date_between(start_date='-30d', end_date='today'),
+    rows.append((
+        random_date(today, LAB_TEST_DAYS, rng),
         'Fasting Glucose', round(fasting_glucose, 0), 'mg/dL', 70, 99, True,
         f"Elevated fasting glucose consistent with {phenotype_name}"
     ))
+    return rows
 
-def add_glucose_readings(cursor, patient_id, phenotype_name):
-    """Add glucose readings for the past 30 days"""
-    for i in range(30):
-        reading_date = datetime.now() - timedelta(days=i)
-        
-        # Generate glucose values based on phenotype
-        if phenotype_name in ['Type 1 Diabetes - Autoimmune', 'Type 2 Diabetes - Insulin Resistant']:
-            glucose_value = random.uniform(80, 350)
-        elif phenotype_name == 'Gestational Diabetes':
-            glucose_value = random.uniform(70, 200)
-        else:
-            glucose_value = random.uniform(90, 250)
-        
-        reading_type = random.choice(['Fasting', 'Postprandial', 'Random', 'Bedtime'])
-        
-        cursor.execute("""
-            INSERT INTO glucose_readings (
-                patient_id, reading_date, glucose_value, reading_type, meal_context, notes
-            ) VALUES (%s, %s, %s, %s, %s, %s)
-        """, (
-            patient_id, reading_date, round(glucose_value, 0),
-            reading_type, random.choice(['Breakfast', 'Lunch', 'Dinner', 'Snack', None]),
-            f"Home glucose monitoring - {phenotype_name}"
-        ))
-
-def add_vital_signs(cursor, patient_id):
-    """Add vital signs for the past 30 days"""
-    for i in range(10):  # 10 measurements over 30 days
-        measurement_date = datetime.now() - timedelta(days=i*3)
-        
-        cursor.execute("""
-            INSERT INTO vital_signs (
-                patient_id, measurement_date, systolic_bp, diastolic_bp,
-                heart_rate, temperature, respiratory_rate, oxygen_saturation, notes
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            patient_id, measurement_date,
-            random.randint(110, 160), random.randint(70, 100),
-            random.randint(60, 100), round(random.uniform(36.5, 37.5), 1),
-            random.randint(12, 20), round(random.uniform(95.0, 99.9), 1),
-            "Routine vital signs measurement"
-        ))
+def add_glucose_readings(phenotype_name, now, np_rng):
+    """Build glucose reading rows for the past 30 days"""
+    count = 30
+    
+    # Generate glucose values based on phenotype
+    low, high = PHENOTYPE_PARAMS[phenotype_name]['glucose']
+    
+    # Draw each column for all readings at once; tolist() hands back plain
+    # Python values for the COPY writer
+    glucose_values = np_rng.uniform(low, high, size=count).round().tolist()
+    reading_types = np_rng.choice(READING_TYPES, size=count).tolist()
+    meal_contexts = [MEAL_CONTEXTS[i] for i in np_rng.integers(len(MEAL_CONTEXTS), size=count)]
+    notes = f"Home glucose monitoring - {phenotype_name}"
+    
+    return [
+        (now - timedelta(days=i), glucose_values[i],
+         reading_types[i], meal_contexts[i], notes)
+        for i in range(count)
+    ]
 
-def add_medications(cursor, patient_id, phenotype_name):
-    """Add relevant medications based on phenotype"""
-    medications = {
-        'Type 1 Diabetes - Autoimmune': ['Insulin Glargine', 'Insulin Lispro'],
-        'Type 2 Diabetes - Insulin Resistant': ['Metformin', 'Glipizide', 'Insulin Glargine'],
-        'Gestational Diabetes': ['Insulin Lispro', 'Metformin'],
-        'MODY (Maturity Onset Diabetes of the Young)': ['Sulfonylurea', 'Metformin'],
-        'LADA (Latent Autoimmune Diabetes in Adults)': ['Metformin', 'Insulin Glargine']
-    }
+def add_vital_signs(now, np_rng):
+    """Build vital sign rows for the past 30 days"""
+    count = 10  # 10 measurements over 30 days
     
-    med_list = medications.get(phenotype_name, ['Metformin'])
+    # integers' upper bound is exclusive
+    columns = zip(
+        np_rng.integers(110, 161, size=count).tolist(),
+        np_rng.integers(70, 101, size=count).tolist(),
+        np_rng.integers(60, 101, size=count).tolist(),
+        np_rng.uniform(36.5, 37.5, size=count).round(1).tolist(),
+        np_rng.integers(12, 21, size=count).tolist(),
+        np_rng.uniform(95.0, 99.9, size=count).round(1).tolist(),
+    )
     
-    for med_name in med_list:
-        # Check if medication exists, if not insert it
-        cursor.execute("SELECT medication_id FROM medications WHERE medication_name = %s", (med_name,))
-        result = cursor.fetchone()
-        
-        if result:
-            medication_id = result[0]
-        else:
-            cursor.execute("""
-                INSERT INTO medications (medication_name, generic_name, medication_class, dosage_form, strength)
-                VALUES (%s, %s, %s, %s, %s) RETURNING medication_id
-            """, (med_name, med_name, 'Antidiabetic', 'Tablet', '500mg'))
-            medication_id = cursor.fetchone()[0]
-        
+    return [
+        (now - timedelta(days=i*3),
+         systolic, diastolic, heart_rate, temperature, respiratory_rate, oxygen_saturation,
+         "Routine vital signs measurement")
+        for i, (systolic, diastolic, heart_rate, temperature, respiratory_rate, oxygen_saturation)
+        in enumerate(columns)
+    ]
+
+def add_medications(phenotype_name, today, rng):
+    """Build prescription rows, keyed by medication name, based on phenotype"""
+    rows = []
+    for med_name in PHENOTYPE_PARAMS[phenotype_name]['medications']:
         # Prescribe medication
-        prescribed_date = fake.date_between(start_date='-6m', end_date='-1m')
-        cursor.execute("""
-            INSERT INTO patient_medications (
-                patient_id, medication_id, prescribed_date, start_date, dosage,
-                frequency, route, status, prescribed_by, notes
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            patient_id, medication_id, prescribed_date, prescribed_date,
+        prescribed_date = random_date(today, PRESCRIPTION_DAYS, rng)
+        rows.append((
+            med_name, prescribed_date, prescribed_date,
             '500mg', 'Twice daily', 'Oral', 'Active',
             'Dr. Smith', f"Prescribed for {phenotype_name} management"
         ))
+    return rows
 
-def main():
-    """Main function to populate the database"""
-    print("Connecting to database...")
-    conn = connect_to_db()
+def main(conn=None):
+    """Main function to populate the database (optionally on an existing connection)"""
+    owns_connection = conn is None
+    if owns_connection:
+        print("Connecting to database...")
+        conn = connect_to_db()
+    
+    # Load everything in one transaction. The data is synthetic and the run
+    # can simply be repeated, so don't wait for the WAL flush on commit.
+    with conn.cursor() as cursor:
+        cursor.execute("SET LOCAL synchronous_commit TO OFF")
     
     print("Inserting phenotypes...")
     phenotype_ids = insert_phenotypes(conn)
     
     print("Inserting patients and related data...")
     insert_patients_and_phenotypes(conn, phenotype_ids)
+    conn.commit()
     
     print("Database population completed successfully!")
     print(f"Created {len(phenotype_ids)} phenotypes")
     print(f"Created {len(phenotype_ids) * 4} patients (4 per phenotype)")
     
-    conn.close()
+    if owns_connection:
+        conn.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -7,6 +7,7 @@ Creates the diabetes database and applies the schema
 import psycopg2
 import sys
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,19 +19,21 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'diabetes_db'),
     'user': os.getenv('DB_USER', 'postgres'),
     'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': int(os.getenv('DB_PORT', 5431))
+    'port': int(os.getenv('DB_PORT', 5431)),
+    'connect_timeout': 5,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
 }
 
+# Resolved relative to this file so the script works from any directory
+SCHEMA_PATH = Path(__file__).resolve().parent / 'schema.sql'
+
 def create_database():
     """Create the diabetes database if it doesn't exist"""
     # Connect to default postgres database
-    conn = psycopg2.connect(
-        host=DB_CONFIG['host'],
-        database='postgres',
-        user=DB_CONFIG['user'],
-        password=DB_CONFIG['password'],
-        port=DB_CONFIG['port']
-    )
+    conn = psycopg2.connect(**{**DB_CONFIG, 'database': 'postgres'})
     conn.autocommit = True
     cursor = conn.cursor()
     
@@ -48,23 +51,28 @@ def create_database():
     cursor.close()
     conn.close()
 
-def apply_schema():
-    """Apply the database schema"""
+def apply_schema(conn=None):
+    """Apply the database schema (optionally on an existing connection)"""
     # Connect to the diabetes database
-    conn = psycopg2.connect(**DB_CONFIG)
+    owns_connection = conn is None
+    if owns_connection:
+        conn = psycopg2.connect(**DB_CONFIG)
     cursor = conn.cursor()
     
     # Read and execute schema file
-    with open('schema.sql', 'r') as f:
-        schema_sql = f.read()
+    schema_sql = SCHEMA_PATH.read_text(encoding='utf-8')
     
     print("Applying database schema...")
-    cursor.execute(schema_sql)
+    # Send the whole file as one batch in a single transaction. The schema
+    # is DDL only, so there are no INSERT runs to batch; skipping the WAL
+    # flush wait on commit is safe because a lost commit is just re-applied.
+    cursor.execute("SET LOCAL synchronous_commit TO OFF;\n" + schema_sql)
     conn.commit()
     print("Schema applied successfully!")
     
     cursor.close()
-    conn.close()
+    if owns_connection:
+        conn.close()
 
 def main():
     """Main setup function"""
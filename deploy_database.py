@@ -7,6 +7,7 @@ Deploys the diabetes database schema and sample data to GCP
 import psycopg2
 import sys
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,102 +19,122 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'diabetes_db'),
     'user': os.getenv('DB_USER', 'diabetes_user'),
     'password': os.getenv('DB_PASSWORD'),
-    'port': int(os.getenv('DB_PORT', 5432))
+    'port': int(os.getenv('DB_PORT', 5432)),
+    'connect_timeout': 5,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
 }
 
+# schema.sql and populate_database.py live in db_setup/; resolve them from
+# this file so the deploy works from any directory
+DB_SETUP_DIR = Path(__file__).resolve().parent / 'db_setup'
+SCHEMA_PATH = DB_SETUP_DIR / 'schema.sql'
+sys.path.insert(0, str(DB_SETUP_DIR))
+
 def test_connection():
-    """Test database connection"""
+    """Open the deployment connection and test it; returns None on failure"""
     print("🔍 Testing database connection...")
     try:
         conn = psycopg2.connect(**DB_CONFIG)
         cursor = conn.cursor()
         cursor.execute("SELECT version();")
         version = cursor.fetchone()
+        conn.commit()
         print(f"✅ Connected successfully to PostgreSQL: {version[0]}")
         cursor.close()
-        conn.close()
-        return True
+        return conn
     except Exception as e:
         print(f"❌ Connection failed: {e}")
-        return False
+        return None
+
+def configure_bulk_session(conn):
+    """Relax commit durability and raise work_mem for the schema + populate phase"""
+    # Commits stop waiting for the WAL fsync; a crash can lose at most the
+    # last few hundred milliseconds of commits, never corrupt data. The
+    # deploy is repeatable (clean_database.py, then rerun), so that is safe.
+    cursor = conn.cursor()
+    cursor.execute("SET synchronous_commit TO OFF; SET work_mem = '64MB';")
+    conn.commit()
+    cursor.close()
 
-def apply_schema():
+def apply_schema(conn):
     """Apply the database schema"""
     print("🔧 Applying database schema...")
     
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
         cursor = conn.cursor()
         
         # Read and execute schema file
-        with open('schema.sql', 'r') as f:
-            schema_sql = f.read()
+        schema_sql = SCHEMA_PATH.read_text(encoding='utf-8')
         
+        # Send the whole file as one batch in a single transaction
         cursor.execute(schema_sql)
         conn.commit()
         print("✅ Schema applied successfully!")
         
         cursor.close()
-        conn.close()
         return True
     except Exception as e:
         print(f"❌ Schema application failed: {e}")
         return False
 
-def populate_data():
+def populate_data(conn):
     """Populate the database with sample data"""
     print("🔧 Populating database with sample data...")
     
     try:
-        # Import and run the population script
+        # Import and run the population script on the shared connection
         from populate_database import main as populate_main
-        populate_main()
+        populate_main(conn)
         print("✅ Data population completed successfully!")
         return True
     except Exception as e:
         print(f"❌ Data population failed: {e}")
         return False
 
-def verify_deployment():
+def verify_deployment(conn):
     """Verify the deployment by checking key tables"""
     print("🔍 Verifying deployment...")
     
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
         cursor = conn.cursor()
         
-        # Check if tables exist
+        # Check core tables exist before counting, so a missing one is
+        # reported by name instead of failing the count query
+        core_tables = ('patients', 'phenotypes', 'patient_phenotypes')
         cursor.execute("""
             SELECT table_name 
             FROM information_schema.tables 
             WHERE table_schema = 'public' 
-            AND table_name IN ('patients', 'phenotypes', 'patient_phenotypes')
-            ORDER BY table_name;
-        """)
-        tables = cursor.fetchall()
+            AND table_name = ANY(%s);
+        """, (list(core_tables),))
+        found = {row[0] for row in cursor.fetchall()}
         
-        if len(tables) >= 3:
-            print("✅ Core tables created successfully")
-        else:
-            print(f"⚠️  Only {len(tables)} core tables found")
+        if len(found) < len(core_tables):
+            missing = ', '.join(t for t in core_tables if t not in found)
+            print(f"⚠️  Only {len(found)} core tables found (missing: {missing})")
+            cursor.close()
+            conn.commit()
+            return False
+        print("✅ Core tables created successfully")
         
-        # Check patient count
-        cursor.execute("SELECT COUNT(*) FROM patients;")
-        patient_count = cursor.fetchone()[0]
-        print(f"✅ {patient_count} patients loaded")
+        # Row counts in a single round-trip
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM patients),
+                (SELECT COUNT(*) FROM phenotypes),
+                (SELECT COUNT(*) FROM patient_phenotypes);
+        """)
+        patient_count, phenotype_count, assignment_count = cursor.fetchone()
         
-        # Check phenotype count
-        cursor.execute("SELECT COUNT(*) FROM phenotypes;")
-        phenotype_count = cursor.fetchone()[0]
+        print(f"✅ {patient_count} patients loaded")
         print(f"✅ {phenotype_count} phenotypes loaded")
-        
-        # Check patient-phenotype assignments
-        cursor.execute("SELECT COUNT(*) FROM patient_phenotypes;")
-        assignment_count = cursor.fetchone()[0]
         print(f"✅ {assignment_count} patient-phenotype assignments created")
         
         cursor.close()
-        conn.close()
+        conn.commit()
         return True
     except Exception as e:
         print(f"❌ Verification failed: {e}")
@@ -144,8 +165,9 @@ def main():
         print("Please set DB_PASSWORD in your .env file")
         sys.exit(1)
     
-    # Test connection
-    if not test_connection():
+    # Test connection; the same connection is reused for every step below
+    conn = test_connection()
+    if conn is None:
         print("\n❌ Cannot proceed without database connection")
         print("Please ensure:")
         print("1. Cloud SQL Proxy is running (./start_proxy.sh)")
@@ -153,20 +175,25 @@ def main():
         print("3. Network access is configured")
         sys.exit(1)
     
-    # Apply schema
-    if not apply_schema():
-        print("\n❌ Schema deployment failed")
-        sys.exit(1)
-    
-    # Populate data
-    if not populate_data():
-        print("\n❌ Data population failed")
-        sys.exit(1)
-    
-    # Verify deployment
-    if not verify_deployment():
-        print("\n❌ Deployment verification failed")
-        sys.exit(1)
+    try:
+        configure_bulk_session(conn)
+        
+        # Apply schema
+        if not apply_schema(conn):
+            print("\n❌ Schema deployment failed")
+            sys.exit(1)
+        
+        # Populate data
+        if not populate_data(conn):
+            print("\n❌ Data population failed")
+            sys.exit(1)
+        
+        # Verify deployment
+        if not verify_deployment(conn):
+            print("\n❌ Deployment verification failed")
+            sys.exit(1)
+    finally:
+        conn.close()
     
     print("")
     print("🎉 Database deployment completed successfully!")
@@ -7,13 +7,36 @@ Automates the deployment of the diabetes database to Google Cloud Platform
 import subprocess
 import sys
 import os
-import time
+import platform
 import json
-from dotenv import load_dotenv
+from dotenv import load_dotenv, find_dotenv, set_key
 
 # Load environment variables
 load_dotenv()
 
+CLOUD_SQL_PROXY_VERSION = 'v2.11.4'
+
+def write_file_atomic(path, content, mode=None):
+    """Write a file via a temporary sibling so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    if mode is not None:
+        os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+
+def format_command(argv):
+    """Render a command for display with any --*password= values masked"""
+    masked = []
+    for arg in argv:
+        flag, sep, _ = arg.partition('=')
+        if sep and flag.startswith('--') and flag.endswith('password'):
+            arg = f"{flag}=****"
+        masked.append(arg)
+    return ' '.join(masked)
+
 class GCPDeployer:
     def __init__(self):
         self.project_id = os.getenv('GCP_PROJECT_ID')
@@ -22,28 +45,48 @@ class GCPDeployer:
         self.user_name = 'diabetes_user'
         self.region = 'us-west2'
         self.tier = 'db-f1-micro'
+        self._instance_info = None
         
         if not self.project_id:
             print("❌ GCP_PROJECT_ID not set in environment variables")
             print("Please set GCP_PROJECT_ID in your .env file or environment")
             sys.exit(1)
     
-    def run_command(self, command, check=True):
-        """Run a shell command and return the result"""
+    def run_command(self, argv, check=True):
+        """Run a command (given as an argument list, without a shell) and return its output"""
         try:
-            result = subprocess.run(command, shell=True, capture_output=True, text=True, check=check)
+            result = subprocess.run(argv, capture_output=True, text=True, check=check)
             return result.stdout.strip()
         except subprocess.CalledProcessError as e:
-            print(f"❌ Command failed: {command}")
+            print(f"❌ Command failed: {format_command(argv)}")
             print(f"Error: {e.stderr}")
             if check:
                 sys.exit(1)
             return None
     
+    def run_stream(self, argv, check=True, env=None):
+        """Run a long-running command, echoing its output as it arrives, and return the output"""
+        lines = []
+        with subprocess.Popen(
+            argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1, env=env
+        ) as proc:
+            for line in proc.stdout:
+                print(line, end='', flush=True)
+                lines.append(line)
+        if proc.returncode != 0:
+            print(f"❌ Command failed: {format_command(argv)}")
+            if check:
+                sys.exit(1)
+            return None
+        return ''.join(lines).strip()
+    
     def check_gcloud_auth(self):
         """Check if gcloud is authenticated"""
         print("🔍 Checking gcloud authentication...")
-        result = self.run_command("gcloud auth list --filter=status:ACTIVE --format='value(account)'", check=False)
+        result = self.run_command(
+            ["gcloud", "auth", "list", "--filter=status:ACTIVE", "--format=value(account)"],
+            check=False
+        )
         if not result:
             print("❌ Not authenticated with gcloud")
             print("Please run: gcloud auth login")
@@ -52,8 +95,13 @@ class GCPDeployer:
     
     def set_project(self):
         """Set the GCP project"""
+        current_project = self.run_command(["gcloud", "config", "get-value", "project"], check=False)
+        if current_project == self.project_id:
+            print(f"✅ Project already set to: {self.project_id}")
+            return
+        
         print(f"🔧 Setting project to: {self.project_id}")
-        self.run_command(f"gcloud config set project {self.project_id}")
+        self.run_command(["gcloud", "config", "set", "project", self.project_id])
         print("✅ Project set successfully")
     
     def enable_apis(self):
@@ -64,20 +112,28 @@ class GCPDeployer:
             'compute.googleapis.com'
         ]
         
-        for api in apis:
-            print(f"Enabling {api}...")
-            self.run_command(f"gcloud services enable {api}")
+        # Only enable what is missing; on repeat deploys that is nothing
+        enabled = self.run_command([
+            "gcloud", "services", "list", "--enabled",
+            f"--filter=config.name:({' OR '.join(apis)})", "--format=value(config.name)"
+        ], check=False) or ''
+        missing = [api for api in apis if api not in enabled.split()]
+        if not missing:
+            print("✅ APIs already enabled")
+            return
+        
+        # gcloud accepts several services at once, so enable them in one call
+        print(f"Enabling {', '.join(missing)}...")
+        self.run_command(["gcloud", "services", "enable", *missing])
         
         print("✅ APIs enabled successfully")
     
     def check_instance_exists(self):
         """Check if the Cloud SQL instance already exists"""
         print(f"🔍 Checking if instance {self.instance_name} exists...")
-        result = self.run_command(
-            f"gcloud sql instances list --filter='name:{self.instance_name}' --format='value(name)'",
-            check=False
-        )
-        return bool(result)
+        # describe doubles as the existence check and caches the connection
+        # details, so an existing instance is only queried once per deploy
+        return self._describe(check=False) is not None
     
     def create_instance(self):
         """Create the Cloud SQL PostgreSQL instance"""
@@ -92,29 +148,35 @@ class GCPDeployer:
         if not root_password:
             root_password = input("Enter root password for Cloud SQL instance: ")
         
-        command = f"""gcloud sql instances create {self.instance_name} \
-            --database-version=POSTGRES_14 \
-            --tier={self.tier} \
-            --region={self.region} \
-            --storage-type=SSD \
-            --storage-size=10GB \
-            --backup-start-time=02:00 \
-            --maintenance-window-day=SUN \
-            --maintenance-window-hour=3 \
-            --authorized-networks=0.0.0.0/0 \
-            --root-password='{root_password}'"""
+        command = [
+            "gcloud", "sql", "instances", "create", self.instance_name,
+            "--database-version=POSTGRES_14",
+            f"--tier={self.tier}",
+            f"--region={self.region}",
+            "--storage-type=SSD",
+            "--storage-size=10GB",
+            "--backup-start-time=02:00",
+            "--maintenance-window-day=SUN",
+            "--maintenance-window-hour=3",
+            "--authorized-networks=0.0.0.0/0",
+            f"--root-password={root_password}",
+            "--async",
+            "--format=value(name)",
+        ]
         
-        self.run_command(command)
-        print("✅ Cloud SQL instance created successfully")
+        operation_id = self.run_command(command)
         
-        # Wait for instance to be ready
+        # Block exactly as long as the create operation takes
         print("⏳ Waiting for instance to be ready...")
-        time.sleep(30)
+        self.run_stream(["gcloud", "sql", "operations", "wait", operation_id, "--timeout=600"])
+        print("✅ Cloud SQL instance created successfully")
     
     def create_database(self):
         """Create the database"""
         print(f"🔧 Creating database: {self.database_name}")
-        self.run_command(f"gcloud sql databases create {self.database_name} --instance={self.instance_name}")
+        self.run_command(
+            ["gcloud", "sql", "databases", "create", self.database_name, f"--instance={self.instance_name}"]
+        )
         print("✅ Database created successfully")
     
     def create_user(self):
@@ -126,64 +188,103 @@ class GCPDeployer:
         if not user_password:
             user_password = input(f"Enter password for user {self.user_name}: ")
         
-        self.run_command(f"gcloud sql users create {self.user_name} --instance={self.instance_name} --password='{user_password}'")
+        self.run_command([
+            "gcloud", "sql", "users", "create", self.user_name,
+            f"--instance={self.instance_name}", f"--password={user_password}"
+        ])
         print("✅ User created successfully")
         
         return user_password
     
-    def get_instance_ip(self):
-        """Get the instance IP address"""
-        print("🔍 Getting instance IP address...")
-        ip = self.run_command(f"gcloud sql instances describe {self.instance_name} --format='value(ipAddresses[0].ipAddress)'")
-        print(f"✅ Instance IP: {ip}")
-        return ip
+    def _describe(self, check=True):
+        """Fetch and cache (ip, connection_name); None if the instance is missing"""
+        if self._instance_info is None:
+            output = self.run_command([
+                "gcloud", "sql", "instances", "describe", self.instance_name,
+                "--format=value(connectionName,ipAddresses[0].ipAddress)"
+            ], check=check)
+            # One describe call returns both fields, tab-separated. The IP is
+            # empty until the instance has finished provisioning, so it goes
+            # last and any output at all means the instance exists.
+            if output:
+                connection_name, _, ip = output.partition('\t')
+                self._instance_info = (ip or None, connection_name)
+        return self._instance_info
     
-    def get_connection_name(self):
-        """Get the connection name for Cloud SQL Proxy"""
-        print("🔍 Getting connection name...")
-        connection_name = self.run_command(f"gcloud sql instances describe {self.instance_name} --format='value(connectionName)'")
+    def describe_instance(self):
+        """Get the instance IP address and Cloud SQL Proxy connection name"""
+        print("🔍 Getting instance IP address and connection name...")
+        ip, connection_name = self._describe()
+        if not ip:
+            print(f"❌ Instance {self.instance_name} has no IP address yet")
+            print("It may still be provisioning; check: gcloud sql operations list "
+                  f"--instance={self.instance_name}")
+            sys.exit(1)
+        print(f"✅ Instance IP: {ip}")
         print(f"✅ Connection name: {connection_name}")
-        return connection_name
+        return ip, connection_name
     
     def update_env_file(self, ip_address, user_password):
         """Update the .env file with GCP connection details"""
         print("🔧 Updating .env file with GCP connection details...")
         
-        env_content = f"""# GCP Cloud SQL Configuration
-DB_HOST={ip_address}
-DB_NAME={self.database_name}
-DB_USER={self.user_name}
-DB_PASSWORD={user_password}
-DB_PORT=5432
-
-# GCP Project Configuration
-GCP_PROJECT_ID={self.project_id}
-GCP_INSTANCE_NAME={self.instance_name}
-GCP_REGION={self.region}
-"""
-        
-        with open('.env', 'w') as f:
-            f.write(env_content)
+        # Update only the keys this deploy owns; anything else in .env is kept
+        env_path = find_dotenv() or '.env'
+        env_pairs = [
+            ('DB_HOST', ip_address),
+            ('DB_NAME', self.database_name),
+            ('DB_USER', self.user_name),
+            ('DB_PASSWORD', user_password),
+            ('DB_PORT', '5432'),
+            ('GCP_PROJECT_ID', self.project_id),
+            ('GCP_INSTANCE_NAME', self.instance_name),
+            ('GCP_REGION', self.region),
+        ]
+        for key, value in env_pairs:
+            set_key(env_path, key, value, quote_mode='never')
         
         print("✅ .env file updated successfully")
     
     def install_dependencies(self):
         """Install Python dependencies"""
         print("🔧 Installing Python dependencies...")
-        self.run_command("pip install -r requirements.txt")
+        # Take wheels over sdists, reuse pip's cache across deploys and skip
+        # byte-compiling the installed packages
+        env = {
+            **os.environ,
+            'PIP_CACHE_DIR': os.environ.get('PIP_CACHE_DIR', os.path.expanduser('~/.cache/pip')),
+        }
+        self.run_stream(
+            [sys.executable, "-m", "pip", "install", "--prefer-binary", "--no-compile",
+             "-r", "requirements.txt"],
+            env=env
+        )
         print("✅ Dependencies installed successfully")
     
     def deploy_database(self):
         """Deploy the database schema and data"""
         print("🔧 Deploying database schema and data...")
         
+        # Run the setup and population steps in-process on one connection.
+        # Reload .env first so their DB_CONFIG sees what update_env_file wrote.
+        load_dotenv(override=True)
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_setup'))
+        import psycopg2
+        from setup_database import DB_CONFIG, create_database, apply_schema
+        from populate_database import main as populate_main
+        
         # Run setup script
         print("Running database setup...")
-        self.run_command("python setup_database.py")
-        
-        # Run population script
-        print("Populating database with sample data...")
-        self.run_command("python populate_database.py")
+        create_database()
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            apply_schema(conn)
+            
+            # Run population script
+            print("Populating database with sample data...")
+            populate_main(conn)
+        finally:
+            conn.close()
         
         print("✅ Database deployment completed successfully")
     
@@ -202,20 +303,30 @@ echo ""
 echo "Press Ctrl+C to stop the proxy"
 echo ""
 
-./cloud_sql_proxy -instances={connection_name}=tcp:5432
+./cloud-sql-proxy {connection_name} --port 5432
 """
         
-        with open('start_proxy.sh', 'w') as f:
-            f.write(script_content)
-        
-        os.chmod('start_proxy.sh', 0o755)
+        write_file_atomic('start_proxy.sh', script_content, mode=0o755)
         print("✅ Cloud SQL Proxy script created: start_proxy.sh")
     
     def download_cloud_sql_proxy(self):
-        """Download Cloud SQL Proxy"""
+        """Download the Cloud SQL Proxy v2 binary for this OS and architecture"""
         print("🔧 Downloading Cloud SQL Proxy...")
-        self.run_command("curl -o cloud_sql_proxy https://dl.google.com/cloudsql/cloud_sql_proxy.darwin.amd64")
-        self.run_command("chmod +x cloud_sql_proxy")
+        os_key = {'Darwin': 'darwin', 'Linux': 'linux'}.get(platform.system())
+        arch = {'x86_64': 'amd64', 'amd64': 'amd64', 'arm64': 'arm64', 'aarch64': 'arm64'}.get(
+            platform.machine().lower()
+        )
+        if not os_key or not arch:
+            print(f"❌ No Cloud SQL Proxy build for {platform.system()} {platform.machine()}")
+            print("Download it manually: https://cloud.google.com/sql/docs/postgres/sql-proxy")
+            sys.exit(1)
+        
+        url = (
+            "https://storage.googleapis.com/cloud-sql-connectors/cloud-sql-proxy/"
+            f"{CLOUD_SQL_PROXY_VERSION}/cloud-sql-proxy.{os_key}.{arch}"
+        )
+        self.run_command(["curl", "-fsSL", "-o", "cloud-sql-proxy", url])
+        os.chmod('cloud-sql-proxy', 0o755)
         print("✅ Cloud SQL Proxy downloaded successfully")
     
     def deploy(self):
@@ -246,8 +357,7 @@ echo ""
             user_password = self.create_user()
             
             # Get connection details
-            ip_address = self.get_instance_ip()
-            connection_name = self.get_connection_name()
+            ip_address, connection_name = self.describe_instance()
             
             # Update environment file
             self.update_env_file(ip_address, user_password)
@@ -144,7 +144,8 @@ conn = psycopg2.connect(
     database=os.getenv('DB_NAME'),
     user=os.getenv('DB_USER'),
     password=os.getenv('DB_PASSWORD'),
-    port=int(os.getenv('DB_PORT', 5432))
+    port=int(os.getenv('DB_PORT', 5432)),
+    connect_timeout=5
 )
 cursor = conn.cursor()
 cursor.execute('SELECT COUNT(*) FROM patients')
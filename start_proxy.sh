@@ -16,4 +16,4 @@ echo ""
 echo "Press Ctrl+C to stop the proxy"
 echo ""
 
-./cloud_sql_proxy -instances=$GCP_PROJECT_ID:$GCP_REGION:$GCP_INSTANCE_NAME=tcp:$DB_PORT
+./cloud-sql-proxy $GCP_PROJECT_ID:$GCP_REGION:$GCP_INSTANCE_NAME --port $DB_PORT